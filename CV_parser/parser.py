@@ -19,13 +19,9 @@ from CV_parser.pydantic_models_prompts import (
     skills_prompt, fallback_skills_prompt,
     fallback_education_prompt
 )
+from rag.telemetry import metrics, span
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-stream_handler = logging.StreamHandler(sys.stdout)
-stream_handler.setLevel(logging.INFO)
-
-logger.addHandler(stream_handler)
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
@@ -58,14 +54,27 @@ class ResumeManager:
         start = time.time()
         chain = create_extraction_chain_pydantic(target, self.model)
 
-        result = chain.invoke({"input": self.resume})
+        with span(f"llm.{target.__name__.lower()}", model=self.model_name):
+            result = chain.invoke({"input": self.resume})
         end = time.time()
         seconds = end - start
         return result, seconds
 
-    def query_model(self, query, json_mode=True):
+    def query_model(self, query, json_mode=True, stage="llm.query"):
         start = time.time()
 
+        with span(stage, model=self.model_name, json_mode=json_mode) as attributes:
+            completion = self._create_completion(query, json_mode)
+            if completion.usage:
+                attributes['prompt_tokens'] = completion.usage.prompt_tokens
+                attributes['completion_tokens'] = completion.usage.completion_tokens
+
+        end = time.time()
+        seconds = end - start
+        result = completion.choices[0].message.content
+        return result, seconds
+
+    def _create_completion(self, query, json_mode):
         if json_mode:
             completion = self.groq_client.chat.completions.create(
                 model=self.model_name,
@@ -82,15 +91,11 @@ class ResumeManager:
                            "content": query}],
                 timeout=8,
             )
-
-        end = time.time()
-        seconds = end - start
-        result = completion.choices[0].message.content
-        return result, seconds
+        return completion
 
     def extract_basic_info(self):
         query = basic_details_prompt.format(resume=self.resume)
-        output, seconds = self.query_model(query)
+        output, seconds = self.query_model(query, stage="llm.basic_info")
         output = json.loads(output)
         logger.debug(f"# Basic Info Extract:\n{output}")
         logger.info(f"# Basic Info Extraction took {seconds} seconds")
@@ -99,27 +104,30 @@ class ResumeManager:
             self.output['candidate_name'] = output['name']
         except KeyError:
             query = fallback_basic_info_prompt.format(query='name', resume=self.resume)
-            name, _ = self.query_model(query, json_mode=False)
+            metrics.increment("fallbacks_total", stage="basic_info.name")
+            name, _ = self.query_model(query, json_mode=False, stage="llm.basic_info_fallback")
             self.output['candidate_name'] = name
 
         try:
             self.output['job_title'] = output['job_title']
         except KeyError:
             query = fallback_basic_info_prompt.format(query='current or last job title', resume=self.resume)
-            title, _ = self.query_model(query, json_mode=False)
+            metrics.increment("fallbacks_total", stage="basic_info.job_title")
+            title, _ = self.query_model(query, json_mode=False, stage="llm.basic_info_fallback")
             self.output['job_title'] = title
 
         try:
             self.output['bio'] = output['bio']
         except KeyError:
             query = fallback_basic_info_prompt.format(query='bio or profile summary', resume=self.resume)
-            bio, _ = self.query_model(query, json_mode=False)
+            metrics.increment("fallbacks_total", stage="basic_info.bio")
+            bio, _ = self.query_model(query, json_mode=False, stage="llm.basic_info_fallback")
             self.output['bio'] = bio
 
     def extract_skills(self):
         try:
             query = skills_prompt.format(resume=self.resume)
-            output, seconds = self.query_model(query)
+            output, seconds = self.query_model(query, stage="llm.skills")
             output = json.loads(output)
             logger.debug(f"# Skills Extract:\n{output}")
             logger.info(f"# Skills Extraction took {seconds} seconds")
@@ -127,8 +135,9 @@ class ResumeManager:
 
         except Exception as e:
             logger.warning(f"Skills extraction error: {e}")
+            metrics.increment("fallbacks_total", stage="skills")
             query = fallback_skills_prompt.format(resume=self.resume)
-            output, seconds = self.query_model(query, json_mode=False)
+            output, seconds = self.query_model(query, json_mode=False, stage="llm.skills_fallback")
             logger.debug(f"# Skills Extract:\n{output}")
             logger.info(f"# Skills Extraction took {seconds} seconds")
             self.output['skills'] = [skill.strip() for skill in output.split(',')]
@@ -142,8 +151,9 @@ class ResumeManager:
 
         except Exception as e:
             logger.warning(f"Education extraction error: {e}")
+            metrics.increment("fallbacks_total", stage="education")
             query = fallback_education_prompt.format(resume=self.resume)
-            output, seconds = self.query_model(query, json_mode=False)
+            output, seconds = self.query_model(query, json_mode=False, stage="llm.education_fallback")
             logger.debug(f"# Education Extract:\n{output}")
             logger.info(f"# Education Extraction took {seconds} seconds")
             self.output['education'] = output
@@ -152,6 +162,11 @@ class ResumeManager:
 def get_resume_content(file_path, extension=None):
     if not extension:
         extension = os.path.splitext(file_path)[1]
+    with span("text_extraction", extension=extension):
+        return _extract_text(file_path, extension)
+
+
+def _extract_text(file_path, extension):
     if extension == '.pdf':
         pdf_reader = PdfReader(file_path)
         content = ""
@@ -178,9 +193,17 @@ if __name__ == "__main__":
     parser.add_argument("file_path", help="Path to the resume, accepted types .pdf or .docx")
     parser.add_argument("--model_name", default='deepseek-r1-distill-llama-70b',
                         help="Name of the model, default to llama-3.1-8b-instant")
+    parser.add_argument("--search_url", default=os.environ.get("JOB_SEARCH_URL"),
+                        help="URL of the job search service, when set the matching jobs are added to the output")
+    parser.add_argument("--top_k", type=int, default=5, help="Number of matching jobs to return")
+    parser.add_argument("--metrics_json", default=os.environ.get("METRICS_JSON_PATH"),
+                        help="Write the per-stage timings, token counts and fallbacks to this JSON file")
 
     args = parser.parse_args()
-    logging.info(f"Processing {args.file_path}")
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    if args.metrics_json:
+        metrics.start_json_dump(args.metrics_json)
+    logger.info(f"Processing {args.file_path}")
 
     resume_manager = ResumeManager(args.file_path, args.model_name)
 
@@ -188,6 +211,15 @@ if __name__ == "__main__":
     resume_manager.process_file()
     end_time = time.time()
 
+    if args.search_url:
+        from rag.search_client import SearchClient, build_query
+
+        hits = SearchClient(args.search_url).search_one(build_query(resume_manager.output), args.top_k)
+        resume_manager.output['matching_jobs'] = [
+            {'field': job.metadata.get('field'), 'url': job.metadata.get('url'), 'score': score}
+            for job, score in hits
+        ]
+
     resume_name = Path(args.file_path).stem
     output_file_path = f"{resume_name}_output.json"
     with open(output_file_path, 'w') as file:
@@ -1,15 +1,22 @@
 import streamlit as st
-import pandas as pd
+import logging
 import os
-import json
+import sys
 import tempfile
 from pathlib import Path
-import torch
-from langchain_community.document_loaders import CSVLoader
-from langchain.schema import Document
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from CV_parser.parser import ResumeManager, get_resume_content
+from dotenv import load_dotenv
+from rag.search_client import SearchClient, build_query
+from rag.telemetry import metrics, span
+from rag.warmup import IndexWarmup
+
+# torch, langchain and FAISS are only imported by the background warm-up thread
+# (and the CV parser when a CV is processed), so the first page render does not wait for them
+load_dotenv()
+logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+
+# When set, searches go to the job search service (python -m rag.search_service)
+# instead of loading the model and index in this process
+JOB_SEARCH_URL = os.environ.get("JOB_SEARCH_URL")
 
 # Set page configuration
 st.set_page_config(
@@ -19,73 +26,20 @@ st.set_page_config(
 )
 
 @st.cache_resource
-def load_embedding_model():
-    """Load the embedding model once and cache it"""
-    # EMBEDDING_MODEL_NAME = "dangvantuan/vietnamese-document-embedding"
-    EMBEDDING_MODEL_NAME = "thenlper/gte-large"
-    
-    embedding_model = HuggingFaceEmbeddings(
-        model_name=EMBEDDING_MODEL_NAME,
-        multi_process=True,
-        model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu", "trust_remote_code": True},
-        encode_kwargs={"normalize_embeddings": True},  # set True for cosine similarity
-    )
-    return embedding_model
+def get_index_warmup():
+    """Start loading the embedding model and job vectorstore once, in the background"""
+    # Set EMBEDDING_BACKEND=onnx to use the quantized ONNX model on CPU-only hosts
+    return IndexWarmup()
 
 @st.cache_resource
-def create_job_vectorstore():
-    """Create and cache the job vectorstore from CSV data"""
-    csv_file_path = fr"data\job_details_full.csv"
-
-    # Function to clean text by replacing newlines with spaces
-    def clean_text(text):
-        if text is None:
-            return ""
-        return text.replace('\n', ' ').strip()
-
-    # Load CSV file directly as pandas DataFrame
-    import pandas as pd
-    df = pd.read_csv(csv_file_path)
+def start_metrics_dump():
+    """Periodically write the pipeline metrics to METRICS_JSON_PATH"""
+    metrics.start_json_dump()
 
-    # Create a document for each row
-    docs_list = []
-    for index, row in df.iterrows():
-        # Create metadata from DataFrame columns
-        metadata = {
-            'source': csv_file_path,
-            'row': index,
-            'field': clean_text(str(row.get('Field', ''))),
-            'experience': clean_text(str(row.get('Experience', ''))),
-            'location': clean_text(str(row.get('Location', ''))),
-            'company_size': clean_text(str(row.get('Company Size', ''))),
-            'salary': clean_text(str(row.get('Salary', ''))),
-            'job_requirements': clean_text(str(row.get('Job Requirements', ''))),
-            'url': clean_text(str(row.get('URL', ''))),
-        }
-        
-        # Extract additional numeric fields if they exist
-        if 'Experience_year' in row:
-            metadata['experience_year'] = str(row['Experience_year'])
-        if 'minSalary' in row:
-            metadata['min_salary'] = str(row['minSalary'])
-        if 'maxSalary' in row:
-            metadata['max_salary'] = str(row['maxSalary'])
-        
-        # Create page content with only Field, Location, and Job Requirements
-        page_content = f"Field: {metadata['field']} Location: {metadata['location']} Job Requirements: {metadata['job_requirements']}"
-        
-        # Create document with clean metadata
-        new_doc = Document(
-            page_content=clean_text(page_content),
-            metadata=metadata
-        )
-        docs_list.append(new_doc)
-    
-    # Create vector store
-    embedding_model = load_embedding_model()
-    vectorstore = FAISS.from_documents(documents=docs_list, embedding=embedding_model)
-    
-    return vectorstore
+@st.cache_resource
+def get_search_client():
+    """Client of the job search service"""
+    return SearchClient(JOB_SEARCH_URL)
 
 def process_cv(file, model_name="deepseek-r1-distill-llama-70b"):
     """Process the uploaded CV file"""
@@ -94,6 +48,8 @@ def process_cv(file, model_name="deepseek-r1-distill-llama-70b"):
         tmp_file.write(file.getvalue())
         file_path = tmp_file.name
         
+    from CV_parser.parser import ResumeManager
+
     try:
         # Use your existing ResumeManager to process the CV
         resume_manager = ResumeManager(file_path, model_name)
@@ -104,20 +60,33 @@ def process_cv(file, model_name="deepseek-r1-distill-llama-70b"):
         if os.path.exists(file_path):
             os.remove(file_path)
 
-def find_matching_jobs(cv_data, vectorstore, top_k=5):
+def find_matching_jobs(cv_data, vectorstore=None, top_k=5):
     """Find jobs matching the CV profile"""
     # Create a query string from CV data
-    query = f"Field: {cv_data.get('job_title', '')} Job Requirements: {' '.join(cv_data.get('skills', []))}"
-    
+    query = build_query(cv_data)
+
     # Search for similar jobs
-    embedding_model = load_embedding_model()
-    results = vectorstore.similarity_search_with_score(query, k=top_k)
-    
-    return results
+    if JOB_SEARCH_URL:
+        with span("remote_search", top_k=top_k):
+            return get_search_client().search_one(query, top_k)
+
+    with span("query_embedding", batch_size=1):
+        vector = vectorstore.embedding_function.embed_query(query)
+    with span("vector_search", batch_size=1, top_k=top_k):
+        return vectorstore.similarity_search_with_score_by_vector(vector, k=top_k)
 
 # Main Streamlit app
 def main():
     st.title("CV Job Matcher")
+    start_metrics_dump()
+
+    warmup = None
+    if not JOB_SEARCH_URL:
+        # Starts the warm-up thread on the first run, the page renders without waiting for it
+        warmup = get_index_warmup()
+        if warmup.error is not None:
+            # Forget the failed warm-up so that the next run (or the search below) retries it
+            get_index_warmup.clear()
     
     # Sidebar
     with st.sidebar:
@@ -133,10 +102,18 @@ def main():
     if not process_button or uploaded_file is None:
         st.info("Upload your CV and click 'Find Matching Jobs' to see job recommendations.")
         
-        # Load and preprocess job data in the background
-        with st.spinner("Preparing job database..."):
-            job_vectorstore = create_job_vectorstore()
-        st.success("Job database loaded and ready!")
+        if JOB_SEARCH_URL:
+            if get_search_client().is_ready():
+                st.success("Job search service is ready!")
+            else:
+                st.warning(f"Job search service at {JOB_SEARCH_URL} is not reachable.")
+        elif warmup.is_ready():
+            st.success("Job database loaded and ready!")
+        elif warmup.error is not None:
+            st.error(f"Job database failed to load: {warmup.error}. Reload the page to retry.")
+        else:
+            # The job database keeps loading in the background, searches wait for it
+            st.info("Preparing job database in the background...")
         
     elif process_button and uploaded_file is not None:
         # Process CV
@@ -160,7 +137,7 @@ def main():
         
         # Find matching jobs
         with st.spinner("Finding matching jobs..."):
-            job_vectorstore = create_job_vectorstore()
+            job_vectorstore = None if JOB_SEARCH_URL else get_index_warmup().wait()
             matching_jobs = find_matching_jobs(cv_data, job_vectorstore)
         
         # Display matching jobs
@@ -170,24 +147,25 @@ def main():
         sorted_jobs = sorted(matching_jobs, key=lambda x: x[1], reverse=True)
         
         # Display sorted jobs
-        for i, (job, score) in enumerate(sorted_jobs, 1):
-            st.subheader(f"#{i}: {job.metadata.get('field')} - Score: {score:.2f}")
+        with span("render", jobs=len(sorted_jobs)):
+            for i, (job, score) in enumerate(sorted_jobs, 1):
+                st.subheader(f"#{i}: {job.metadata.get('field')} - Score: {score:.2f}")
             
-            col1, col2 = st.columns(2)
-            with col1:
-                st.write(f"**Field:** {job.metadata.get('field', 'Not specified')}")
-                st.write(f"**Location:** {job.metadata.get('location', 'Not specified')}")
-                st.write(f"**Experience Required:** {job.metadata.get('experience', 'Not specified')}")
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.write(f"**Field:** {job.metadata.get('field', 'Not specified')}")
+                    st.write(f"**Location:** {job.metadata.get('location', 'Not specified')}")
+                    st.write(f"**Experience Required:** {job.metadata.get('experience', 'Not specified')}")
             
-            with col2:
-                st.write(f"**Salary:** {job.metadata.get('salary', 'Not specified')}")
-                st.write(f"**Company Size:** {job.metadata.get('company_size', 'Not specified')}")
-                if job.metadata.get('url'):
-                    st.markdown(f"**[Apply Here]({job.metadata.get('url')})**")
+                with col2:
+                    st.write(f"**Salary:** {job.metadata.get('salary', 'Not specified')}")
+                    st.write(f"**Company Size:** {job.metadata.get('company_size', 'Not specified')}")
+                    if job.metadata.get('url'):
+                        st.markdown(f"**[Apply Here]({job.metadata.get('url')})**")
             
-            st.write(f"**Job Requirements:**")
-            st.write(job.page_content.split("Job Requirements: ")[-1] if "Job Requirements: " in job.page_content else "Not specified")
-            st.divider()
+                st.write(f"**Job Requirements:**")
+                st.write(job.page_content.split("Job Requirements: ")[-1] if "Job Requirements: " in job.page_content else "Not specified")
+                st.divider()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,39 @@
+import argparse
+import json
+
+
+def flatten(results, prefix=""):
+    """Numeric leaves of the results as {"search.10000.single.p95_ms": value}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline_path, current_path):
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    with open(current_path) as file:
+        current = json.load(file)
+
+    print(f"{'metric':<60} {baseline['commit']:>12} {current['commit']:>12} {'change':>9}")
+    baseline_results = flatten(baseline['results'])
+    for name, value in flatten(current['results']).items():
+        if name not in baseline_results:
+            continue
+        before = baseline_results[name]
+        change = f"{(value - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"{name:<60} {before:>12.3f} {value:>12.3f} {change:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+
+    args = parser.parse_args()
+    compare(args.baseline, args.current)
@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Returned for every JSON mode query, holds the keys of both the basic info and the skills prompts
+FAKE_PROFILE = {
+    'name': "Nguyen Van A",
+    'job_title': "Data Engineer",
+    'bio': "Data engineer with 3 years of experience building ETL pipelines.",
+    'skills': ["Python", "SQL", "Spark", "Airflow", "Docker"],
+}
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    """OpenAI compatible chat completions endpoint, as called by the groq SDK and ChatGroq"""
+
+    latency = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        time.sleep(self.latency)
+
+        message = {'role': "assistant", 'content': None}
+        if request.get('tools'):
+            # Tool calling, as used by create_extraction_chain_pydantic
+            message['tool_calls'] = [
+                {
+                    'id': f"call_{i}",
+                    'type': "function",
+                    'function': {
+                        'name': tool['function']['name'],
+                        'arguments': json.dumps({name: f"fake {name}" for name in
+                                                 tool['function']['parameters'].get('properties', {})}),
+                    },
+                }
+                for i, tool in enumerate(request['tools'])
+            ]
+            finish_reason = "tool_calls"
+        elif request.get('response_format', {}).get('type') == "json_object":
+            message['content'] = json.dumps(FAKE_PROFILE)
+            finish_reason = "stop"
+        else:
+            message['content'] = ", ".join(FAKE_PROFILE['skills'])
+            finish_reason = "stop"
+
+        prompt_tokens = sum(len(str(x.get('content', '')).split()) for x in request.get('messages', []))
+        completion_tokens = len(json.dumps(message).split())
+        body = json.dumps({
+            'id': "chatcmpl-fake",
+            'object': "chat.completion",
+            'created': int(time.time()),
+            'model': request.get('model', "fake"),
+            'choices': [{'index': 0, 'message': message, 'finish_reason': finish_reason}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        }).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeGroqServer:
+    """Local stand-in for the Groq API with a configurable latency per completion.
+
+    Usage:
+        with FakeGroqServer(latency=0.5) as base_url:
+            os.environ["GROQ_BASE_URL"] = base_url
+    """
+
+    def __init__(self, latency=0.0, host="127.0.0.1", port=0):
+        handler = type("Handler", (FakeGroqHandler,), {'latency': latency})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self.base_url
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,255 @@
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_groq import FakeGroqServer
+from benchmarks.synthetic_corpus import get_or_generate_corpus
+from rag import job_store
+from rag.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+STAGES = ["ingestion", "embedding", "search", "parsing"]
+
+
+def latency_stats(seconds):
+    """p50/p95/p99 and mean latency in milliseconds"""
+    import numpy as np
+
+    ms = np.array(seconds) * 1000
+    return {
+        'count': len(ms),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+    }
+
+
+def bench_ingestion(embedding_model, rows):
+    """create_job_vectorstore path: CSV to documents, then embedding and indexing"""
+    results = {}
+    for n_rows in rows:
+        csv_file_path = get_or_generate_corpus(n_rows)
+
+        start = time.time()
+        job_store.load_job_documents(csv_file_path)
+        load_seconds = time.time() - start
+
+        start = time.time()
+        job_store.create_job_vectorstore(embedding_model, csv_file_path)
+        total_seconds = time.time() - start
+
+        results[str(n_rows)] = {
+            'load_documents_seconds': load_seconds,
+            'create_vectorstore_seconds': total_seconds,
+            'docs_per_second': n_rows / total_seconds,
+        }
+        logger.info(f"Ingestion of {n_rows} jobs: {results[str(n_rows)]}")
+    return results
+
+
+def bench_embedding(embedding_model, n_docs, batch_sizes):
+    docs = job_store.load_job_documents(get_or_generate_corpus(n_docs))
+    texts = [doc.page_content for doc in docs]
+
+    # First call pays for lazy initialization
+    embedding_model.embed_documents(texts[:1])
+
+    results = {}
+    for batch_size in batch_sizes:
+        start = time.time()
+        for i in range(0, len(texts), batch_size):
+            embedding_model.embed_documents(texts[i:i + batch_size])
+        seconds = time.time() - start
+        results[f"batch_{batch_size}"] = {'seconds': seconds, 'docs_per_second': len(texts) / seconds}
+        logger.info(f"Embedding with batch size {batch_size}: {results[f'batch_{batch_size}']}")
+    return results
+
+
+def _random_index(embedding_model, n_rows, docs):
+    """FAISS index of n_rows random unit vectors, search cost without embedding the whole corpus"""
+    import faiss
+    import numpy as np
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    dim = len(embedding_model.embed_query("dimension"))
+    vectors = np.random.default_rng(0).standard_normal((n_rows, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    # Added straight from the numpy array, a list of 10^9 Python floats would not fit in memory at 1M rows
+    index = faiss.IndexFlatL2(dim)
+    index.add(vectors)
+
+    # Every vector points at one of the real jobs, the docstore holds each job once
+    docstore = InMemoryDocstore({str(i): doc for i, doc in enumerate(docs)})
+    index_to_docstore_id = {i: str(i % len(docs)) for i in range(n_rows)}
+    return FAISS(embedding_model, index, docstore, index_to_docstore_id)
+
+
+def bench_search(embedding_model, rows, n_queries, concurrency, top_k=5):
+    """Single query latency and batched latency/throughput through the search service batcher"""
+    from rag.search_client import build_query
+    from rag.search_service import SearchBatcher
+
+    docs = job_store.load_job_documents()
+    queries = [build_query({'job_title': doc.metadata['field'], 'skills': doc.metadata['job_requirements'].split()[:20]})
+               for doc in docs]
+    queries = [queries[i % len(queries)] for i in range(n_queries)]
+
+    results = {}
+    for n_rows in rows:
+        vectorstore = _random_index(embedding_model, n_rows, docs)
+
+        single = []
+        for query in queries:
+            start = time.time()
+            vectorstore.similarity_search_with_score(query, k=top_k)
+            single.append(time.time() - start)
+
+        batcher = SearchBatcher(embedding_model, lambda vectors, k: job_store.search_by_vectors(vectorstore, vectors, k))
+        batched = []
+        lock = threading.Lock()
+
+        def timed_search(query):
+            start = time.time()
+            batcher.search([query], top_k)
+            with lock:
+                batched.append(time.time() - start)
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(timed_search, queries))
+        seconds = time.time() - start
+
+        results[str(n_rows)] = {
+            'single': latency_stats(single),
+            'batched': {**latency_stats(batched), 'concurrency': concurrency,
+                        'queries_per_second': len(queries) / seconds},
+        }
+        logger.info(f"Search over {n_rows} jobs: {results[str(n_rows)]}")
+    return results
+
+
+def _write_resume(path):
+    import docx
+
+    document = docx.Document()
+    document.add_heading("Nguyen Van A", 0)
+    document.add_paragraph("Data Engineer - Ho Chi Minh City")
+    document.add_paragraph("Data engineer with 3 years of experience building ETL pipelines on Spark and Airflow.")
+    document.add_heading("Skills", 1)
+    document.add_paragraph("Python, SQL, Spark, Airflow, Docker, Kubernetes, PostgreSQL")
+    document.add_heading("Education", 1)
+    document.add_paragraph("Bachelor in Computer Science, University of Science, 2020")
+    document.save(path)
+
+
+def bench_parsing(n_runs, latency):
+    """get_resume_content and ResumeManager.process_file against a local fake Groq server"""
+    with FakeGroqServer(latency=latency) as base_url:
+        # Read by the groq SDK client and by ChatGroq
+        os.environ["GROQ_BASE_URL"] = base_url
+        os.environ["GROQ_API_BASE"] = base_url
+        os.environ["GROQ_API_KEY"] = "fake"
+        from CV_parser.parser import ResumeManager, get_resume_content
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            resume_path = os.path.join(tmp_dir, "resume.docx")
+            _write_resume(resume_path)
+
+            extract, process = [], []
+            for _ in range(n_runs):
+                start = time.time()
+                get_resume_content(resume_path)
+                extract.append(time.time() - start)
+
+                resume_manager = ResumeManager(resume_path, "fake-model")
+                start = time.time()
+                resume_manager.process_file()
+                process.append(time.time() - start)
+
+    results = {'llm_latency_seconds': latency, 'get_resume_content': latency_stats(extract),
+               'process_file': latency_stats(process)}
+    logger.info(f"Parsing: {results}")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args):
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'embedding_backend': job_store.get_embedding_backend(),
+        'config': vars(args),
+        'results': {},
+    }
+
+    if "ingestion" in args.stages:
+        # Same configuration as the app and the warm-up: a pool of encoding processes
+        ingestion_model = job_store.load_embedding_model(multi_process=True)
+        report['results']['ingestion'] = {'multi_process': True,
+                                          **bench_ingestion(ingestion_model, args.ingest_rows)}
+        del ingestion_model
+
+    embedding_model = None
+    if set(args.stages) & {"embedding", "search"}:
+        # Same configuration as the search service
+        embedding_model = job_store.load_embedding_model(multi_process=False)
+
+    if "embedding" in args.stages:
+        report['results']['embedding'] = bench_embedding(embedding_model, args.embed_docs, args.batch_sizes)
+    if "search" in args.stages:
+        report['results']['search'] = bench_search(embedding_model, args.search_rows, args.queries, args.concurrency)
+    if "parsing" in args.stages:
+        report['results']['parsing'] = bench_parsing(args.parse_runs, args.llm_latency)
+
+    # Per-stage histograms and token/fallback counters recorded while benchmarking
+    snapshot = metrics.snapshot()
+    report['metrics'] = {'histograms': snapshot['histograms'], 'counters': snapshot['counters']}
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    logger.info(f"Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+
+    parser = argparse.ArgumentParser(description="End-to-end performance benchmarks of the CV to jobs pipeline")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--ingest_rows", type=int, nargs="+", default=[10_000],
+                        help="Synthetic corpus sizes embedded and indexed by the ingestion benchmark")
+    parser.add_argument("--embed_docs", type=int, default=1_000)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--search_rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Index sizes of the search benchmark, filled with random vectors")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--parse_runs", type=int, default=20)
+    parser.add_argument("--llm_latency", type=float, default=0.5, help="Seconds the fake Groq server waits per call")
+    parser.add_argument("--output", default=None, help=f"JSON results file, default to {RESULTS_DIR}/<commit>_<time>.json")
+
+    args = parser.parse_args()
+    run(args)
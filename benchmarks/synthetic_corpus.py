@@ -0,0 +1,55 @@
+import argparse
+import os
+import re
+
+from rag.job_store import JOB_CSV_PATH
+
+SYNTHETIC_DIR = os.path.join("data", "synthetic")
+
+
+def generate_corpus(n_rows, source_csv=JOB_CSV_PATH, seed=0):
+    """Scale the job corpus to n_rows by resampling the real jobs.
+
+    Every synthetic job gets a unique URL and its Job Requirements sentences shuffled,
+    so the embeddings are not exact duplicates of the source rows.
+    """
+    import numpy as np
+    import pandas as pd
+
+    source = pd.read_csv(source_csv)
+    rng = np.random.default_rng(seed)
+    df = source.iloc[rng.integers(0, len(source), size=n_rows)].reset_index(drop=True)
+
+    def shuffle_sentences(text):
+        sentences = [x for x in re.split(r'(?<=[.!?])\s+', str(text)) if x]
+        rng.shuffle(sentences)
+        return " ".join(sentences)
+
+    df['Job Requirements'] = df['Job Requirements'].map(shuffle_sentences)
+    df['URL'] = [f"{url}#synthetic-{i}" for i, url in enumerate(df['URL'])]
+    return df
+
+
+def synthetic_csv_path(n_rows, output_dir=SYNTHETIC_DIR):
+    return os.path.join(output_dir, f"job_details_{n_rows}.csv")
+
+
+def get_or_generate_corpus(n_rows, source_csv=JOB_CSV_PATH, output_dir=SYNTHETIC_DIR, seed=0):
+    """Path of the synthetic CSV file with n_rows jobs, generated on first use"""
+    csv_file_path = synthetic_csv_path(n_rows, output_dir)
+    if not os.path.exists(csv_file_path):
+        os.makedirs(output_dir, exist_ok=True)
+        generate_corpus(n_rows, source_csv, seed).to_csv(csv_file_path, index=False)
+    return csv_file_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scale job_details_full.csv to a synthetic corpus")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--source_csv", default=JOB_CSV_PATH)
+    parser.add_argument("--output_dir", default=SYNTHETIC_DIR)
+    parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    for n_rows in args.rows:
+        print(get_or_generate_corpus(n_rows, args.source_csv, args.output_dir, args.seed))
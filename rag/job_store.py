@@ -0,0 +1,153 @@
+import os
+
+from rag.telemetry import span
+
+# torch, langchain and FAISS are imported inside the functions that use them, so that
+# importing this module stays cheap for the app and the thin clients
+
+# EMBEDDING_MODEL_NAME = "dangvantuan/vietnamese-document-embedding"
+EMBEDDING_MODEL_NAME = "thenlper/gte-large"
+JOB_CSV_PATH = os.path.join("data", "job_details_full.csv")
+
+DEFAULT_ONNX_MODEL_DIR = os.path.join("models", "gte-large-onnx-int8")
+JOB_INDEX_DIR = os.path.join("models", "job_faiss_index")
+
+
+def get_embedding_backend():
+    """"torch" (sentence-transformers) or "onnx" (quantized model run by onnxruntime)
+
+    Read from EMBEDDING_BACKEND at call time, so a .env file loaded after import applies.
+    """
+    return os.environ.get("EMBEDDING_BACKEND", "torch")
+
+
+def get_onnx_model_dir():
+    return os.environ.get("ONNX_MODEL_DIR", DEFAULT_ONNX_MODEL_DIR)
+
+
+def clean_text(text):
+    """Replace newlines with spaces"""
+    if text is None:
+        return ""
+    return text.replace('\n', ' ').strip()
+
+
+def load_job_documents(csv_file_path=JOB_CSV_PATH):
+    """Create a document for each job row of the CSV file"""
+    import pandas as pd
+    from langchain.schema import Document
+
+    df = pd.read_csv(csv_file_path)
+
+    docs_list = []
+    for index, row in df.iterrows():
+        # Create metadata from DataFrame columns
+        metadata = {
+            'source': csv_file_path,
+            'row': index,
+            'field': clean_text(str(row.get('Field', ''))),
+            'experience': clean_text(str(row.get('Experience', ''))),
+            'location': clean_text(str(row.get('Location', ''))),
+            'company_size': clean_text(str(row.get('Company Size', ''))),
+            'salary': clean_text(str(row.get('Salary', ''))),
+            'job_requirements': clean_text(str(row.get('Job Requirements', ''))),
+            'url': clean_text(str(row.get('URL', ''))),
+        }
+
+        # Extract additional numeric fields if they exist
+        if 'Experience_year' in row:
+            metadata['experience_year'] = str(row['Experience_year'])
+        if 'minSalary' in row:
+            metadata['min_salary'] = str(row['minSalary'])
+        if 'maxSalary' in row:
+            metadata['max_salary'] = str(row['maxSalary'])
+
+        # Create page content with only Field, Location, and Job Requirements
+        page_content = f"Field: {metadata['field']} Location: {metadata['location']} Job Requirements: {metadata['job_requirements']}"
+
+        # Create document with clean metadata
+        new_doc = Document(
+            page_content=clean_text(page_content),
+            metadata=metadata
+        )
+        docs_list.append(new_doc)
+
+    return docs_list
+
+
+def load_embedding_model(backend=None, multi_process=True, num_threads=None):
+    """Load the embedding model for the given backend ("torch" or "onnx")
+
+    multi_process starts a pool of encoding processes on every call, which pays off
+    when indexing the corpus but not for short query batches. num_threads caps the
+    CPU threads of the model, for several models running side by side.
+    """
+    backend = backend or get_embedding_backend()
+
+    if backend == "onnx":
+        from rag.onnx_embeddings import ONNXEmbeddings
+        return ONNXEmbeddings(model_dir=get_onnx_model_dir(), num_threads=num_threads)
+
+    if backend != "torch":
+        raise ValueError(f"Unsupported embedding backend {backend}")
+
+    import torch
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+    embedding_model = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        multi_process=multi_process,
+        model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu", "trust_remote_code": True},
+        encode_kwargs={"normalize_embeddings": True},  # set True for cosine similarity
+    )
+    return embedding_model
+
+
+def create_job_vectorstore(embedding_model, csv_file_path=JOB_CSV_PATH):
+    """Embed every job document into a FAISS vector store"""
+    from langchain_community.vectorstores import FAISS
+
+    docs_list = load_job_documents(csv_file_path)
+    vectorstore = FAISS.from_documents(documents=docs_list, embedding=embedding_model)
+    return vectorstore
+
+
+def load_or_create_job_vectorstore(embedding_model, csv_file_path=JOB_CSV_PATH, index_dir=None):
+    """Load the saved FAISS index, rebuilding it when missing or older than the CSV file"""
+    from langchain_community.vectorstores import FAISS
+
+    # Indexes built by different backends are not interchangeable
+    backend = getattr(embedding_model, "backend", "torch")
+    index_dir = index_dir or f"{JOB_INDEX_DIR}_{backend}"
+    index_file = os.path.join(index_dir, "index.faiss")
+    if os.path.exists(index_file) and os.path.getmtime(index_file) >= os.path.getmtime(csv_file_path):
+        with span("index_load", cache_hit=True):
+            return FAISS.load_local(index_dir, embedding_model, allow_dangerous_deserialization=True)
+
+    with span("index_load", cache_hit=False):
+        vectorstore = create_job_vectorstore(embedding_model, csv_file_path)
+        vectorstore.save_local(index_dir)
+    return vectorstore
+
+
+def search_by_vectors(vectorstore, vectors, k):
+    """Batched FAISS search, one list of (document, score) pairs per query vector"""
+    import numpy as np
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scores, indices = vectorstore.index.search(vectors, k)
+
+    results = []
+    for row_scores, row_indices in zip(scores, indices):
+        hits = []
+        for score, i in zip(row_scores, row_indices):
+            if i == -1:
+                # Fewer than k documents in the index
+                continue
+            doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[i])
+            hits.append((doc, float(score)))
+        results.append(hits)
+    return results
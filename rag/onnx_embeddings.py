@@ -0,0 +1,202 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from rag.job_store import EMBEDDING_MODEL_NAME, JOB_CSV_PATH, get_onnx_model_dir
+
+logger = logging.getLogger(__name__)
+
+ONNX_FILE_NAME = "model_quantized.onnx"
+
+
+class ONNXEmbeddings(Embeddings):
+    """Sentence embeddings from an exported, int8-quantized ONNX model run by onnxruntime.
+
+    Reproduces the sentence-transformers pipeline of thenlper/gte-large on CPU:
+    mean pooling over the last hidden state followed by L2 normalization.
+    """
+
+    # Read by job_store to keep the saved index of each backend apart
+    backend = "onnx"
+
+    def __init__(self, model_dir=None, batch_size=32, max_length=512, num_threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = model_dir or get_onnx_model_dir()
+        model_path = os.path.join(model_dir, ONNX_FILE_NAME)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found, export it with `python -m rag.onnx_embeddings export`")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {x.name for x in self.session.get_inputs()}
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+    def _embed(self, texts):
+        embeddings = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = [text.replace("\n", " ") for text in texts[i:i + self.batch_size]]
+            encoded = self.tokenizer(batch, padding=True, truncation=True,
+                                     max_length=self.max_length, return_tensors="np")
+            inputs = {name: value.astype(np.int64) for name, value in encoded.items() if name in self.input_names}
+            last_hidden_state = self.session.run(None, inputs)[0]
+
+            # Mean pooling over the non-padding tokens
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            embeddings.append(pooled)
+
+        if not embeddings:
+            return []
+        return np.concatenate(embeddings).tolist()
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts))
+
+    def embed_query(self, text):
+        return self._embed([text])[0]
+
+
+def export_onnx_model(output_dir=None, model_name=EMBEDDING_MODEL_NAME, avx512=False):
+    """Export the embedding model to ONNX and apply dynamic int8 quantization"""
+    output_dir = output_dir or get_onnx_model_dir()
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    start = time.time()
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    if avx512:
+        qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    else:
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer = ORTQuantizer.from_pretrained(output_dir)
+    quantizer.quantize(save_dir=output_dir, quantization_config=qconfig)
+
+    # The float model is only needed as input of the quantizer
+    os.remove(os.path.join(output_dir, "model.onnx"))
+    logger.info(f"Exported quantized model to {output_dir} in {time.time() - start:.1f} seconds")
+
+
+def _peak_rss_mb():
+    """Peak resident memory of the current process"""
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        try:
+            import psutil
+        except ImportError:
+            return float("nan")
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def _run_backend(backend, texts):
+    """Load and run one backend, called in a fresh process so that peak memory belongs to it alone"""
+    from rag.job_store import load_embedding_model
+
+    start = time.time()
+    # Single process for both backends, so torch pays neither for a worker pool nor for a model per worker
+    model = load_embedding_model(backend, multi_process=False)
+    load_seconds = time.time() - start
+
+    start = time.time()
+    embeddings = np.array(model.embed_documents(texts), dtype=np.float32)
+    embed_seconds = time.time() - start
+
+    stats = {
+        'load_seconds': load_seconds,
+        'embed_seconds': embed_seconds,
+        'docs_per_second': len(texts) / embed_seconds,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+    return embeddings, stats
+
+
+def _run_backend_in_subprocess(backend, texts):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(_run_backend, backend, texts).result()
+
+
+def compare_backends(csv_file_path=JOB_CSV_PATH, limit=None, top_k=5):
+    """Cosine parity and speed/memory comparison of the ONNX backend against torch on the job corpus"""
+    from rag.job_store import load_job_documents
+
+    texts = [doc.page_content for doc in load_job_documents(csv_file_path)]
+    if limit:
+        texts = texts[:limit]
+
+    onnx_embeddings, onnx_stats = _run_backend_in_subprocess("onnx", texts)
+    torch_embeddings, torch_stats = _run_backend_in_subprocess("torch", texts)
+
+    # Both backends return normalized vectors, so the dot product is the cosine similarity
+    cosine = (onnx_embeddings * torch_embeddings).sum(axis=1)
+
+    # Agreement of the nearest neighbours each backend finds inside the corpus
+    k = min(top_k + 1, len(texts))
+    onnx_top = np.argsort(-onnx_embeddings @ onnx_embeddings.T, axis=1)[:, 1:k]
+    torch_top = np.argsort(-torch_embeddings @ torch_embeddings.T, axis=1)[:, 1:k]
+    overlap = np.mean([len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(onnx_top, torch_top)])
+
+    return {
+        'documents': len(texts),
+        'cosine_mean': float(cosine.mean()),
+        'cosine_min': float(cosine.min()),
+        f'top{top_k}_overlap': float(overlap),
+        'torch': torch_stats,
+        'onnx': onnx_stats,
+    }
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+
+    parser = argparse.ArgumentParser(description="Quantized ONNX runtime for the embedding model")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export and quantize the embedding model")
+    export_parser.add_argument("--output_dir", default=None, help="Default to ONNX_MODEL_DIR")
+    export_parser.add_argument("--model_name", default=EMBEDDING_MODEL_NAME)
+    export_parser.add_argument("--avx512", action="store_true",
+                               help="Quantize for AVX512-VNNI CPUs instead of AVX2")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare the ONNX backend with torch")
+    compare_parser.add_argument("--csv_file_path", default=JOB_CSV_PATH)
+    compare_parser.add_argument("--limit", type=int, default=None, help="Only embed the first N jobs")
+    compare_parser.add_argument("--top_k", type=int, default=5)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx_model(args.output_dir, args.model_name, args.avx512)
+    else:
+        report = compare_backends(args.csv_file_path, args.limit, args.top_k)
+        for key, value in report.items():
+            logger.info(f"{key}: {value}")
@@ -0,0 +1,51 @@
+import json
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+
+
+@dataclass
+class JobHit:
+    """Job returned by the search service, with the same fields as a langchain Document"""
+    page_content: str
+    metadata: dict = field(default_factory=dict)
+
+
+def build_query(cv_data):
+    """Create a query string from CV data"""
+    return f"Field: {cv_data.get('job_title', '')} Job Requirements: {' '.join(cv_data.get('skills', []))}"
+
+
+class SearchClient:
+    """Thin HTTP client of rag.search_service, it does not load any model or index"""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"Job search service error {e.code}: {e.read().decode('utf-8', 'replace')}") from e
+
+    def is_ready(self):
+        try:
+            return self._request("/health").get('status') == 'ok'
+        except (OSError, RuntimeError):
+            return False
+
+    def search(self, queries, top_k=5):
+        """One list of (JobHit, score) pairs per query"""
+        response = self._request("/search", {'queries': list(queries), 'top_k': top_k})
+        return [
+            [(JobHit(hit['page_content'], hit['metadata']), hit['score']) for hit in hits]
+            for hits in response['results']
+        ]
+
+    def search_one(self, query, top_k=5):
+        return self.search([query], top_k)[0]
@@ -0,0 +1,220 @@
+import argparse
+import functools
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rag import job_store
+from rag.telemetry import metrics, span
+
+logger = logging.getLogger(__name__)
+
+
+class SearchBatcher:
+    """Coalesce concurrent searches into micro-batches.
+
+    Every query waits in a queue until the worker thread picks it up. The worker collects
+    up to max_batch_size queries or waits at most max_wait_ms after the first one, then runs
+    one batched embedding and one batched FAISS search for the whole micro-batch.
+
+    search_by_vectors(vectors, k) runs the vector search, either on the in-process index
+    (job_store.search_by_vectors) or scattered over shard workers (ShardedSearcher).
+    """
+
+    def __init__(self, embedding_model, search_by_vectors, max_batch_size=32, max_wait_ms=10):
+        self.embedding_model = embedding_model
+        self.search_by_vectors = search_by_vectors
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.worker = threading.Thread(target=self._run, name="search-batcher", daemon=True)
+        self.worker.start()
+
+    def search(self, queries, top_k=5):
+        """Search several queries, one list of (document, score) pairs per query"""
+        futures = []
+        for query in queries:
+            future = Future()
+            self.queue.put((query, top_k, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # This thread serves every request, nothing may escape the loop
+        while True:
+            batch = []
+            try:
+                batch = self._next_batch()
+                self._process(batch)
+            except Exception as e:
+                logger.exception("Search batch failed")
+                for _, _, future in batch:
+                    # Some futures may already hold their results
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _process(self, batch):
+        start = time.time()
+        queries = [query for query, _, _ in batch]
+        k = max(top_k for _, top_k, _ in batch)
+
+        with span("query_embedding", batch_size=len(batch)):
+            vectors = self.embedding_model.embed_documents(queries)
+        with span("vector_search", batch_size=len(batch), top_k=k):
+            results = self.search_by_vectors(vectors, k)
+        if len(results) != len(batch):
+            raise RuntimeError(f"Vector search returned {len(results)} results for {len(batch)} queries")
+
+        for (_, top_k, future), hits in zip(batch, results):
+            future.set_result(hits[:top_k])
+        logger.debug(f"Searched batch of {len(batch)} queries in {time.time() - start:.3f} seconds")
+
+
+class SearchRequestHandler(BaseHTTPRequestHandler):
+    """JSON API: POST /search {"queries": [...], "top_k": 5}, GET /health and GET /metrics (Prometheus text)"""
+
+    batcher = None
+    # Number of indexed jobs, the largest top_k worth searching for
+    max_top_k = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == "/metrics":
+            body = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/search":
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+
+        # Rejected before queueing, an invalid request must not fail the micro-batch it would join
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            queries, top_k = self._parse_request(json.loads(self.rfile.read(length)))
+        except ValueError as e:
+            self._send_json(400, {'error': f"Invalid request: {e}"})
+            return
+
+        try:
+            results = self.batcher.search(queries, top_k)
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+
+        self._send_json(200, {'results': [
+            [{'page_content': doc.page_content, 'metadata': doc.metadata, 'score': score} for doc, score in hits]
+            for hits in results
+        ]})
+
+    def _parse_request(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("body must be a JSON object")
+
+        queries = request['queries'] if 'queries' in request else [request.get('query')]
+        if not isinstance(queries, list) or not queries or not all(isinstance(x, str) for x in queries):
+            raise ValueError("queries must be a non-empty list of strings")
+
+        top_k = request.get('top_k', 5)
+        if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+            raise ValueError("top_k must be a positive integer")
+        return queries, min(top_k, self.max_top_k)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def serve(host="127.0.0.1", port=8000, max_batch_size=32, max_wait_ms=10, num_shards=0, shard_by="field",
+          build_workers=2):
+    start = time.time()
+    # A single model instance serves every request, the batcher thread is its only user
+    embedding_model = job_store.load_embedding_model(multi_process=False)
+
+    sharded_searcher = None
+    if num_shards:
+        from rag.shards import ShardedSearcher, load_or_build_shards
+
+        manifest = load_or_build_shards(num_shards, shard_by, build_workers=build_workers)
+        sharded_searcher = ShardedSearcher(manifest)
+        search_by_vectors = sharded_searcher.search_by_vectors
+        SearchRequestHandler.max_top_k = sum(shard['documents'] for shard in manifest['shards'])
+    else:
+        vectorstore = job_store.load_or_create_job_vectorstore(embedding_model)
+        search_by_vectors = functools.partial(job_store.search_by_vectors, vectorstore)
+        SearchRequestHandler.max_top_k = vectorstore.index.ntotal
+    logger.info(f"Loaded model and index in {time.time() - start:.1f} seconds")
+
+    # Only when METRICS_JSON_PATH is set
+    metrics.start_json_dump()
+
+    SearchRequestHandler.batcher = SearchBatcher(embedding_model, search_by_vectors, max_batch_size, max_wait_ms)
+    server = ThreadingHTTPServer((host, port), SearchRequestHandler)
+    logger.info(f"Job search service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if sharded_searcher:
+            sharded_searcher.close()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+
+    parser = argparse.ArgumentParser(description="Job search service with dynamic request batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max_batch_size", type=int, default=32,
+                        help="Maximum number of queries embedded and searched together")
+    parser.add_argument("--max_wait_ms", type=float, default=10,
+                        help="How long the first query of a batch waits for others to join")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="Split the index into N shards searched by worker processes, 0 keeps one in-process index")
+    parser.add_argument("--shard_by", choices=["field", "url"], default="field",
+                        help="Partition the jobs by Field category or by hash of URL")
+    parser.add_argument("--build_workers", type=int, default=2,
+                        help="Shards built at once when they need (re)building, each loads its own embedding model")
+
+    args = parser.parse_args()
+    if args.shards < 0:
+        parser.error("--shards must be 0 or more")
+    if args.build_workers < 1:
+        parser.error("--build_workers must be at least 1")
+    serve(args.host, args.port, args.max_batch_size, args.max_wait_ms, args.shards, args.shard_by,
+          args.build_workers)
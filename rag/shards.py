@@ -0,0 +1,263 @@
+import argparse
+import hashlib
+import heapq
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from rag import job_store
+
+logger = logging.getLogger(__name__)
+
+SHARDS_DIR = os.path.join("models", "job_faiss_shards")
+SHARD_BY = ["field", "url"]
+# Every build process loads its own embedding model, this caps how many run at once
+DEFAULT_BUILD_WORKERS = 2
+# Seconds to wait for a shard worker to load its index and to answer a search
+WORKER_START_TIMEOUT = 600
+WORKER_SEARCH_TIMEOUT = 60
+
+# spawn keeps torch and FAISS thread pools out of the child processes on every platform
+mp_context = multiprocessing.get_context("spawn")
+
+
+def _stable_hash(text):
+    # hash() is salted per process, the assignment must be the same for every build
+    return int(hashlib.md5(text.encode('utf-8')).hexdigest(), 16)
+
+
+def partition_documents(docs, num_shards, shard_by="field"):
+    """Split the job documents into num_shards lists.
+
+    "url" spreads jobs uniformly by hash of their URL. "field" keeps every category in one
+    shard, categories are assigned largest first to the least loaded shard.
+    """
+    if num_shards < 1:
+        raise ValueError(f"Number of shards must be at least 1, got {num_shards}")
+    if shard_by not in SHARD_BY:
+        raise ValueError(f"Unsupported shard key {shard_by}, expected one of {SHARD_BY}")
+
+    shards = [[] for _ in range(num_shards)]
+    if shard_by == "url":
+        for doc in docs:
+            shards[_stable_hash(doc.metadata['url']) % num_shards].append(doc)
+        return shards
+
+    counts = Counter(doc.metadata['field'] for doc in docs)
+    loads = [0] * num_shards
+    field_to_shard = {}
+    for field, count in sorted(counts.items(), key=lambda x: (-x[1], x[0])):
+        shard_id = loads.index(min(loads))
+        field_to_shard[field] = shard_id
+        loads[shard_id] += count
+
+    for doc in docs:
+        shards[field_to_shard[doc.metadata['field']]].append(doc)
+    return shards
+
+
+def _threads_per_process(num_processes):
+    return max(1, (os.cpu_count() or 1) // num_processes)
+
+
+def _build_shard(shard_dir, docs, backend, num_threads):
+    from langchain_community.vectorstores import FAISS
+
+    start = time.time()
+    embedding_model = job_store.load_embedding_model(backend, multi_process=False, num_threads=num_threads)
+    vectorstore = FAISS.from_documents(documents=docs, embedding=embedding_model)
+    vectorstore.save_local(shard_dir)
+    return time.time() - start
+
+
+def _manifest_path(shards_dir):
+    return os.path.join(shards_dir, "manifest.json")
+
+
+def build_shards(num_shards, shard_by="field", csv_file_path=job_store.JOB_CSV_PATH,
+                 shards_dir=SHARDS_DIR, backend=None, build_workers=DEFAULT_BUILD_WORKERS):
+    """Build one FAISS index per shard, up to build_workers shards at once in separate processes"""
+    backend = backend or job_store.get_embedding_backend()
+    start = time.time()
+    docs = job_store.load_job_documents(csv_file_path)
+    shards = partition_documents(docs, num_shards, shard_by)
+
+    manifest = {'num_shards': num_shards, 'shard_by': shard_by, 'backend': backend, 'shards': []}
+    build_workers = max(1, min(build_workers, num_shards))
+    num_threads = _threads_per_process(build_workers)
+    with ProcessPoolExecutor(max_workers=build_workers, mp_context=mp_context) as executor:
+        futures = {}
+        for shard_id, shard_docs in enumerate(shards):
+            if not shard_docs:
+                logger.warning(f"Shard {shard_id} has no documents, skipping it")
+                continue
+            shard_dir = os.path.join(shards_dir, f"shard_{shard_id}")
+            futures[shard_dir] = executor.submit(_build_shard, shard_dir, shard_docs, backend, num_threads)
+            manifest['shards'].append({'dir': shard_dir, 'documents': len(shard_docs)})
+
+        for shard_dir, future in futures.items():
+            logger.info(f"Built {shard_dir} in {future.result():.1f} seconds")
+
+    os.makedirs(shards_dir, exist_ok=True)
+    with open(_manifest_path(shards_dir), 'w') as file:
+        json.dump(manifest, file, indent=2)
+    logger.info(f"Built {len(manifest['shards'])} shards of {len(docs)} jobs in {time.time() - start:.1f} seconds")
+    return manifest
+
+
+def load_or_build_shards(num_shards, shard_by="field", csv_file_path=job_store.JOB_CSV_PATH,
+                         shards_dir=SHARDS_DIR, backend=None, build_workers=DEFAULT_BUILD_WORKERS):
+    """Reuse the saved shards when they match the requested layout, are newer than the CSV file
+    and all of their index files still exist"""
+    backend = backend or job_store.get_embedding_backend()
+    manifest_path = _manifest_path(shards_dir)
+    if os.path.exists(manifest_path) and os.path.getmtime(manifest_path) >= os.path.getmtime(csv_file_path):
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        layout_matches = (manifest['num_shards'], manifest['shard_by'], manifest['backend']) == (num_shards, shard_by, backend)
+        files_exist = all(os.path.exists(os.path.join(shard['dir'], "index.faiss")) for shard in manifest['shards'])
+        if layout_matches and files_exist:
+            return manifest
+    return build_shards(num_shards, shard_by, csv_file_path, shards_dir, backend, build_workers)
+
+
+def _serve_shard(shard_dir, conn, num_threads):
+    """Worker process loop: search the shard index for the query vectors sent by the coordinator"""
+    import faiss
+    from langchain_community.vectorstores import FAISS
+
+    faiss.omp_set_num_threads(num_threads)
+    # Queries arrive already embedded, the shard never needs the embedding model
+    vectorstore = FAISS.load_local(shard_dir, None, allow_dangerous_deserialization=True)
+    conn.send("ready")
+
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        vectors, k = request
+        try:
+            conn.send(job_store.search_by_vectors(vectorstore, vectors, k))
+        except Exception as e:
+            conn.send(e)
+    conn.close()
+
+
+def merge_shard_results(shard_results, k):
+    """Merge shard_results[shard][query] lists of (document, score) into the top-k of each query.
+
+    Scores are FAISS L2 distances, so lower is better.
+    """
+    return [heapq.nsmallest(k, (hit for hits in per_query for hit in hits), key=lambda x: x[1])
+            for per_query in zip(*shard_results)]
+
+
+def _receive(process, conn, timeout):
+    """Next message of a shard worker, raising instead of blocking when the worker is gone"""
+    deadline = time.monotonic() + timeout
+    while not conn.poll(0.1):
+        if not process.is_alive():
+            raise RuntimeError(f"Shard worker {process.name} exited with code {process.exitcode}")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Shard worker {process.name} did not answer within {timeout} seconds")
+    try:
+        return conn.recv()
+    except EOFError as e:
+        raise RuntimeError(f"Shard worker {process.name} closed its connection") from e
+
+
+class ShardedSearcher:
+    """Coordinator of the shard worker processes.
+
+    A search is scattered to every shard at once and the per-shard top-k are merged by
+    score. A worker that dies or stops answering fails the search with an exception; the
+    searcher then refuses further searches since the replies of the shards are out of step.
+    """
+
+    def __init__(self, manifest):
+        self.lock = threading.Lock()
+        self.workers = []
+        self.error = None
+        num_threads = _threads_per_process(len(manifest['shards']))
+        for shard in manifest['shards']:
+            parent_conn, child_conn = mp_context.Pipe()
+            process = mp_context.Process(target=_serve_shard, args=(shard['dir'], child_conn, num_threads),
+                                         name=f"shard-{os.path.basename(shard['dir'])}", daemon=True)
+            process.start()
+            # Only the worker holds its end, so the parent sees EOF when the worker exits
+            child_conn.close()
+            self.workers.append((process, parent_conn))
+
+        try:
+            for process, conn in self.workers:
+                _receive(process, conn, WORKER_START_TIMEOUT)
+        except Exception:
+            self.terminate()
+            raise
+
+    def search_by_vectors(self, vectors, k):
+        """Same contract as job_store.search_by_vectors, over all shards"""
+        import numpy as np
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self.lock:
+            if self.error is not None:
+                raise RuntimeError("Sharded search is unavailable after a shard worker failure") from self.error
+            try:
+                for _, conn in self.workers:
+                    conn.send((vectors, k))
+                shard_results = [_receive(process, conn, WORKER_SEARCH_TIMEOUT) for process, conn in self.workers]
+            except Exception as e:
+                self.error = e
+                raise
+
+        for result in shard_results:
+            if isinstance(result, Exception):
+                raise result
+
+        return merge_shard_results(shard_results, k)
+
+    def terminate(self):
+        for process, conn in self.workers:
+            process.terminate()
+            conn.close()
+
+    def close(self):
+        for process, conn in self.workers:
+            try:
+                conn.send(None)
+            except OSError:
+                # The worker is already gone
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+
+    parser = argparse.ArgumentParser(description="Build the sharded job index")
+    parser.add_argument("--num_shards", type=int, required=True)
+    parser.add_argument("--shard_by", choices=SHARD_BY, default="field")
+    parser.add_argument("--csv_file_path", default=job_store.JOB_CSV_PATH)
+    parser.add_argument("--shards_dir", default=SHARDS_DIR)
+    parser.add_argument("--build_workers", type=int, default=DEFAULT_BUILD_WORKERS,
+                        help="Shards built at once, each build process loads its own embedding model")
+
+    args = parser.parse_args()
+    if args.num_shards < 1:
+        parser.error("--num_shards must be at least 1")
+    if args.build_workers < 1:
+        parser.error("--build_workers must be at least 1")
+    build_shards(args.num_shards, args.shard_by, args.csv_file_path, args.shards_dir,
+                 build_workers=args.build_workers)
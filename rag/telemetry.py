@@ -0,0 +1,135 @@
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a FAISS search to a slow LLM call
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Per-stage spans of the CV to jobs pipeline, aggregated into histograms and counters.
+
+    A span records its duration in the stage histogram. Numeric attributes ending in
+    "_tokens" are added to the token counters and a boolean "cache_hit" attribute to the
+    cache hit/miss counters. Only the latest spans are kept for the JSON dump.
+    """
+
+    def __init__(self, max_spans=1000):
+        self.lock = threading.Lock()
+        self.histograms = defaultdict(Histogram)
+        self.counters = defaultdict(float)
+        self.spans = deque(maxlen=max_spans)
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += value
+
+    @contextmanager
+    def span(self, stage, **attributes):
+        """Time the block, the yielded dict takes attributes known only at the end (tokens, cache hits)"""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            with self.lock:
+                self.histograms[stage].observe(duration)
+                for key, value in attributes.items():
+                    if key.endswith("_tokens") and isinstance(value, (int, float)):
+                        self.counters[("tokens_total", (("kind", key[:-len("_tokens")]), ("stage", stage)))] += value
+                    elif key == "cache_hit":
+                        name = "cache_hits_total" if value else "cache_misses_total"
+                        self.counters[(name, (("stage", stage),))] += 1
+                if error:
+                    self.counters[("errors_total", (("error", error), ("stage", stage)))] += 1
+                self.spans.append({'stage': stage, 'start': time.time() - duration, 'seconds': duration,
+                                   'error': error, **attributes})
+
+    def snapshot(self):
+        """Aggregated metrics and recent spans as a JSON-serializable dict"""
+        with self.lock:
+            return {
+                'timestamp': time.time(),
+                'histograms': {
+                    stage: {'buckets': list(h.buckets), 'counts': list(h.counts), 'sum': h.sum, 'count': h.count}
+                    for stage, h in self.histograms.items()
+                },
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in self.counters.items()],
+                'spans': list(self.spans),
+            }
+
+    def render_prometheus(self, prefix="jobsearch"):
+        """Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            name = f"{prefix}_stage_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(list(h.buckets) + ["+Inf"], h.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {h.sum}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+
+            declared = set()
+            for (counter, labels), value in sorted(self.counters.items()):
+                if counter not in declared:
+                    lines.append(f"# TYPE {prefix}_{counter} counter")
+                    declared.add(counter)
+                label_text = ",".join(f'{key}="{label}"' for key, label in labels)
+                lines.append(f"{prefix}_{counter}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.snapshot(), file, default=str)
+        os.replace(tmp_path, path)
+
+    def start_json_dump(self, path=None, interval=60):
+        """Write the snapshot to path every interval seconds and at exit
+
+        path defaults to METRICS_JSON_PATH, read at call time so a .env file loaded after
+        this module was imported still applies. Does nothing when neither is set.
+        """
+        path = path or os.environ.get("METRICS_JSON_PATH")
+        if not path:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self.dump_json(path)
+
+        threading.Thread(target=run, name="metrics-dump", daemon=True).start()
+        atexit.register(self.dump_json, path)
+
+
+# Shared by every module of the process
+metrics = Metrics()
+span = metrics.span
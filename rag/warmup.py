@@ -0,0 +1,73 @@
+import importlib
+import logging
+import threading
+import time
+
+from rag import job_store
+
+logger = logging.getLogger(__name__)
+
+# Imported ahead of use, only the ones of the configured embedding backend
+BACKEND_MODULES = {
+    'torch': ["torch", "langchain_community.embeddings"],
+    'onnx': ["onnxruntime", "transformers"],
+}
+COMMON_MODULES = ["faiss", "langchain_community.vectorstores", "CV_parser.parser"]
+
+
+def heavy_modules(backend=None):
+    backend = backend or job_store.get_embedding_backend()
+    return BACKEND_MODULES.get(backend, []) + COMMON_MODULES
+
+
+class IndexWarmup:
+    """Load the embedding model and the job index in a background thread.
+
+    The caller stays responsive while the thread runs; searches call wait() which blocks
+    until the vector store is ready and re-raises the error if the warm-up failed.
+    """
+
+    def __init__(self, csv_file_path=job_store.JOB_CSV_PATH):
+        self.csv_file_path = csv_file_path
+        self.embedding_model = None
+        self.vectorstore = None
+        self.error = None
+        self.timings = {}
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="index-warmup", daemon=True)
+        self.thread.start()
+
+    def _timed(self, stage, func, *args):
+        start = time.time()
+        result = func(*args)
+        self.timings[stage] = time.time() - start
+        return result
+
+    def _import_heavy_modules(self):
+        for module in heavy_modules():
+            importlib.import_module(module)
+
+    def _run(self):
+        try:
+            self._timed("imports", self._import_heavy_modules)
+            self.embedding_model = self._timed("model_load", job_store.load_embedding_model)
+            self.vectorstore = self._timed("index_load", job_store.load_or_create_job_vectorstore,
+                                           self.embedding_model, self.csv_file_path)
+            logger.info("Startup time: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items())
+                        + f", total {sum(self.timings.values()):.2f}s")
+        except Exception as e:
+            logger.exception("Index warm-up failed")
+            self.error = e
+        finally:
+            self.ready.set()
+
+    def is_ready(self):
+        return self.ready.is_set() and self.error is None
+
+    def wait(self, timeout=None):
+        """Block until the index is loaded and return the vector store"""
+        if not self.ready.wait(timeout):
+            raise TimeoutError("Job index is still loading")
+        if self.error is not None:
+            raise RuntimeError("Job index failed to load") from self.error
+        return self.vectorstore
@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+from rag.search_service import SearchBatcher, SearchRequestHandler
+
+
+class FakeEmbeddings:
+    """Records the batches it embeds, one 1-d vector per query"""
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+def fake_search(vectors, k):
+    # k hits per query, scored by rank
+    return [[(f"job-{vector[0]:.0f}-{i}", float(i)) for i in range(k)] for vector in vectors]
+
+
+@pytest.fixture
+def handler():
+    handler = SearchRequestHandler.__new__(SearchRequestHandler)
+    handler.max_top_k = 10
+    return handler
+
+
+def test_parse_request_accepts_queries_and_query(handler):
+    assert handler._parse_request({'queries': ["a", "b"], 'top_k': 3}) == (["a", "b"], 3)
+    assert handler._parse_request({'query': "a"}) == (["a"], 5)
+
+
+def test_parse_request_clamps_top_k_to_index_size(handler):
+    assert handler._parse_request({'queries': ["a"], 'top_k': 1000}) == (["a"], 10)
+
+
+@pytest.mark.parametrize("request_body", [
+    ["a"],
+    "a",
+    {'queries': "text"},
+    {'queries': []},
+    {'queries': ["a", 1]},
+    {},
+    {'queries': ["a"], 'top_k': 0},
+    {'queries': ["a"], 'top_k': -1},
+    {'queries': ["a"], 'top_k': "5"},
+    {'queries': ["a"], 'top_k': True},
+])
+def test_parse_request_rejects_invalid_requests(handler, request_body):
+    with pytest.raises(ValueError):
+        handler._parse_request(request_body)
+
+
+def test_batcher_coalesces_queries_into_one_batch():
+    embeddings = FakeEmbeddings()
+    batcher = SearchBatcher(embeddings, fake_search, max_batch_size=32, max_wait_ms=200)
+
+    results = batcher.search(["a", "bb", "ccc"], top_k=2)
+
+    assert embeddings.batches == [["a", "bb", "ccc"]]
+    assert [[doc for doc, _ in hits] for hits in results] == [
+        ["job-1-0", "job-1-1"], ["job-2-0", "job-2-1"], ["job-3-0", "job-3-1"],
+    ]
+
+
+def test_batcher_respects_max_batch_size():
+    embeddings = FakeEmbeddings()
+    batcher = SearchBatcher(embeddings, fake_search, max_batch_size=2, max_wait_ms=200)
+
+    batcher.search(["a", "b", "c"], top_k=1)
+
+    assert [len(batch) for batch in embeddings.batches] == [2, 1]
+
+
+def test_batcher_slices_each_request_to_its_own_top_k():
+    embeddings = FakeEmbeddings()
+    batcher = SearchBatcher(embeddings, fake_search, max_batch_size=32, max_wait_ms=500)
+    results = {}
+
+    def search(query, top_k):
+        results[query] = batcher.search([query], top_k)[0]
+
+    threads = [threading.Thread(target=search, args=(query, top_k)) for query, top_k in [("a", 1), ("bb", 4)]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(embeddings.batches) == 1
+    assert len(results["a"]) == 1
+    assert len(results["bb"]) == 4
+
+
+def test_batcher_survives_a_failed_batch():
+    calls = []
+
+    def flaky_search(vectors, k):
+        calls.append(len(vectors))
+        if len(calls) == 1:
+            raise RuntimeError("index unavailable")
+        return fake_search(vectors, k)
+
+    batcher = SearchBatcher(FakeEmbeddings(), flaky_search, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="index unavailable"):
+        batcher.search(["a"])
+    assert len(batcher.search(["a"], top_k=1)[0]) == 1
+
+
+def test_batcher_fails_batch_when_search_returns_too_few_results():
+    batcher = SearchBatcher(FakeEmbeddings(), lambda vectors, k: [], max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="0 results for 1 queries"):
+        batcher.search(["a"])
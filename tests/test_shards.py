@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+from rag.shards import _stable_hash, merge_shard_results, partition_documents
+
+
+def make_doc(field, url):
+    return SimpleNamespace(metadata={'field': field, 'url': url})
+
+
+@pytest.fixture
+def docs():
+    fields = ["IT"] * 5 + ["Sales"] * 3 + ["Finance"] * 2 + ["Design"] * 2
+    return [make_doc(field, f"https://www.topcv.vn/viec-lam/{i}") for i, field in enumerate(fields)]
+
+
+def test_partition_by_field_keeps_categories_together(docs):
+    shards = partition_documents(docs, 2, "field")
+
+    for shard in shards:
+        for field in {doc.metadata['field'] for doc in shard}:
+            assert sum(doc.metadata['field'] == field for doc in shard) == \
+                sum(doc.metadata['field'] == field for doc in docs)
+
+
+def test_partition_by_field_balances_largest_first(docs):
+    shards = partition_documents(docs, 2, "field")
+
+    # IT (5) and Finance (2) vs Sales (3) and Design (2)
+    assert sorted(len(shard) for shard in shards) == [5, 7]
+    assert sum(len(shard) for shard in shards) == len(docs)
+
+
+def test_partition_by_url_is_stable_and_complete(docs):
+    shards = partition_documents(docs, 3, "url")
+
+    assert sum(len(shard) for shard in shards) == len(docs)
+    for shard_id, shard in enumerate(shards):
+        for doc in shard:
+            assert _stable_hash(doc.metadata['url']) % 3 == shard_id
+    assert partition_documents(docs, 3, "url") == shards
+
+
+def test_stable_hash_does_not_depend_on_the_process():
+    # md5 of the URL, unlike hash() which is salted per process
+    assert _stable_hash("https://www.topcv.vn/viec-lam/1") == 0x1a7fb98b1b8e443df6326fef56a42cda
+
+
+@pytest.mark.parametrize("num_shards", [0, -1])
+def test_partition_rejects_invalid_shard_count(docs, num_shards):
+    with pytest.raises(ValueError):
+        partition_documents(docs, num_shards)
+
+
+def test_partition_rejects_unknown_shard_key(docs):
+    with pytest.raises(ValueError):
+        partition_documents(docs, 2, "salary")
+
+
+def test_merge_keeps_lowest_distances_per_query():
+    shard_results = [
+        [[("a", 0.1), ("b", 0.5)], [("x", 0.9)]],
+        [[("c", 0.3), ("d", 0.4)], [("y", 0.2), ("z", 0.8)]],
+    ]
+
+    merged = merge_shard_results(shard_results, 3)
+
+    assert merged == [[("a", 0.1), ("c", 0.3), ("d", 0.4)], [("y", 0.2), ("z", 0.8), ("x", 0.9)]]
@@ -0,0 +1,63 @@
+import pytest
+
+from rag.telemetry import Histogram, Metrics
+
+
+def test_histogram_counts_values_in_their_bucket():
+    histogram = Histogram(buckets=(0.1, 1))
+    for value in [0.05, 0.1, 0.5, 2]:
+        histogram.observe(value)
+
+    # Upper bounds are inclusive, the last count is the +Inf bucket
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+
+
+def test_prometheus_buckets_are_cumulative():
+    metrics = Metrics()
+    metrics.histograms["search"] = Histogram(buckets=(0.1, 1))
+    for value in [0.05, 0.5, 0.7, 3]:
+        metrics.histograms["search"].observe(value)
+
+    lines = metrics.render_prometheus().splitlines()
+
+    assert lines[0] == "# TYPE jobsearch_stage_seconds histogram"
+    assert 'jobsearch_stage_seconds_bucket{stage="search",le="0.1"} 1' in lines
+    assert 'jobsearch_stage_seconds_bucket{stage="search",le="1"} 3' in lines
+    assert 'jobsearch_stage_seconds_bucket{stage="search",le="+Inf"} 4' in lines
+    assert 'jobsearch_stage_seconds_count{stage="search"} 4' in lines
+    assert f'jobsearch_stage_seconds_sum{{stage="search"}} {0.05 + 0.5 + 0.7 + 3}' in lines
+
+
+def test_span_attributes_feed_the_counters():
+    metrics = Metrics()
+    with metrics.span("llm_call", prompt_tokens=120) as attributes:
+        attributes['completion_tokens'] = 30
+    with metrics.span("index_load", cache_hit=True):
+        pass
+    with metrics.span("index_load", cache_hit=False):
+        pass
+    metrics.increment("fallbacks_total", reason="json")
+    metrics.increment("fallbacks_total", reason="json")
+
+    text = metrics.render_prometheus()
+
+    assert 'jobsearch_tokens_total{kind="prompt",stage="llm_call"} 120' in text
+    assert 'jobsearch_tokens_total{kind="completion",stage="llm_call"} 30' in text
+    assert 'jobsearch_cache_hits_total{stage="index_load"} 1' in text
+    assert 'jobsearch_cache_misses_total{stage="index_load"} 1' in text
+    assert 'jobsearch_fallbacks_total{reason="json"} 2' in text
+    # Declared once per counter, whatever the number of label sets
+    assert text.count("# TYPE jobsearch_tokens_total counter") == 1
+    assert 'jobsearch_stage_seconds_count{stage="index_load"} 2' in text
+
+
+def test_span_counts_errors_and_reraises():
+    metrics = Metrics()
+    with pytest.raises(KeyError):
+        with metrics.span("parsing"):
+            raise KeyError("skills")
+
+    assert 'jobsearch_errors_total{error="KeyError",stage="parsing"} 1' in metrics.render_prometheus()
+    assert metrics.snapshot()['spans'][-1]['error'] == "KeyError"